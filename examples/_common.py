@@ -0,0 +1,71 @@
+"""Helpers shared by the example scripts."""
+import atexit
+import signal
+from pathlib import Path
+from threading import Event
+from typing import Optional
+
+from bearcat import Bearcat
+from bearcat.tools import detect_scanner
+
+
+def make_scanner(argv: list[str]) -> Bearcat:
+    """Finds a scanner either from the address given as the first argument or by scanning."""
+    return detect_scanner(argv[1] if len(argv) > 1 else '')
+
+
+def install_sigint(stop_event: Event):
+    """Installs a keyboard interrupt handler that sets a given event to shut down the script."""
+    def exit_gracefully(_, __):
+        print('Quitting...')
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, exit_gracefully)
+
+
+class LogFile:
+    """Appends lines to a log, keeping the file open between writes and only reopening it when the path changes."""
+
+    def __init__(self):
+        self.path: Optional[Path] = None
+        self.file = None
+        atexit.register(self.close)
+
+    def write(self, path: Path, line: str):
+        """Appends a given line to the log file at a given path."""
+        if path != self.path:
+            self.close()
+            self.file = open(path, 'a', buffering=65536)
+            self.path = path
+
+        self.file.write(line)
+
+    def close(self):
+        """Closes the current log file, flushing any buffered lines."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+            self.path = None
+
+
+class AdaptiveInterval:
+    """Poll interval which speeds up around activity and backs off after a long time idle."""
+
+    def __init__(self, active: float = 0.05, normal: float = 0.2, idle: float = 0.5, active_polls: int = 20,
+                 idle_polls: int = 50):
+        self.active = active
+        self.normal = normal
+        self.idle = idle
+        self.active_polls = active_polls
+        self.idle_polls = idle_polls
+        self.quiet_polls = active_polls
+
+    def update(self, activity: bool) -> float:
+        """Records whether the latest poll saw activity and returns the time to wait before the next poll."""
+        self.quiet_polls = 0 if activity else self.quiet_polls + 1
+        if self.quiet_polls < self.active_polls:
+            return self.active
+        elif self.quiet_polls < self.idle_polls:
+            return self.normal
+        else:
+            return self.idle
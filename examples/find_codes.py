@@ -3,31 +3,35 @@ from sys import argv
 from itertools import product
 from string import ascii_uppercase
 
-from bearcat import CommandNotFound, CommandInvalid, UnexpectedResultError
-from bearcat import BearcatBase
+from bearcat import Bearcat
+from bearcat.exceptions import CommandNotFound, CommandInvalid, UnexpectedResultError
 
 
 CHANNEL_FILE = 'backup.csv'
 
 assert len(argv) > 1, "Script requires one argument, the address of the scanner."
 
-bc = BearcatBase(argv[1], int(argv[2]) if len(argv) > 2 else 115200)
+bc = Bearcat(argv[1], int(argv[2]) if len(argv) > 2 else 115200)
 
 # attempt every command possible from AAA to ZZZ
 for x in range(3, 4):
-    for c in product(ascii_uppercase, repeat=x):
-        cmd = ''.join(c)
-        # skip known dangerous commands
-        if cmd in ['CLR', 'EPG', 'POF', 'PRG']:
-            print('Known:', cmd)
-            continue
+    # pipeline one group of commands sharing a prefix at a time so progress is printed as it goes
+    for prefix in product(ascii_uppercase, repeat=x - 1):
+        cmds = []
+        for c in ascii_uppercase:
+            cmd = ''.join(prefix) + c
+            # skip known dangerous commands
+            if cmd in ['CLR', 'EPG', 'POF', 'PRG']:
+                print('Known:', cmd)
+            else:
+                cmds.append(cmd)
 
-        try:
-            bc._execute_command(cmd)
-            print('Valid:', cmd)
-        except CommandNotFound:
-            continue
-        except CommandInvalid:
-            print('Invalid:', cmd)
-        except UnexpectedResultError:
-            print('No result:', cmd)
+        for cmd, result in zip(cmds, bc.pipeline(*cmds, return_exceptions=True)):
+            if isinstance(result, CommandNotFound):
+                continue
+            elif isinstance(result, CommandInvalid):
+                print('Invalid:', cmd)
+            elif isinstance(result, UnexpectedResultError):
+                print('No result:', cmd)
+            else:
+                print('Valid:', cmd)
@@ -1,13 +1,14 @@
 """Monitors the scanner, records audio on squelch, and transcribes the audio."""
-import signal
 import warnings
 
 from sys import argv
-from time import sleep
+from threading import Event
 from sounddevice import Stream, query_devices
 
 from bearcat.classes import RadioState
-from bearcat.tools import detect_scanner, on_squelch
+from bearcat.tools import on_squelch
+
+from _common import install_sigint, make_scanner
 
 warnings.simplefilter(action='ignore', category=FutureWarning)
 warnings.simplefilter(action='ignore', category=UserWarning)
@@ -16,13 +17,7 @@ SAMPLE_RATE = 48000
 BLOCK_SIZE = 4096
 NUM_CHANNELS = 4
 
-running = True
-
-def exit_gracefully(sig_num, frame):
-    """Handles a keyboard interrupt to shut down the script."""
-    global running
-    print('Quitting...')
-    running = False
+stop_event = Event()
 
 
 def handle_audio(in_data, out_data, frames, time, status):
@@ -35,7 +30,7 @@ def handle_squelch(state: RadioState, squelched: bool) -> bool:
     if squelched:
         print(state)
 
-    return running
+    return not stop_event.is_set()
 
 
 print(query_devices())
@@ -46,14 +41,12 @@ stream = Stream(samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE, device=(in_device)
 stream.start()
 print('Audio stream started')
 
-signal.signal(signal.SIGINT, exit_gracefully)
+install_sigint(stop_event)
 
-port = argv[1] if len(argv) > 1 else ''
-bc = detect_scanner(port)
+bc = make_scanner(argv)
 on_squelch(bc, handle_squelch)
 
-while running:
-    sleep(1)
+stop_event.wait()
 
 stream.stop()
 stream.close()
@@ -1,54 +1,88 @@
 """Monitors a BC125AT scanner. Emulates the screen in the console and logs received transmissions to file."""
-import signal
+import os
 from sys import argv
-from time import sleep
+from pathlib import Path
+from time import monotonic
+from threading import Event
 from datetime import datetime
 
-from bearcat.tools import detect_scanner
 from bearcat.scanners.bc125at import BC125AT
 
-LOG_FILE = 'log.csv'
+from _common import LogFile, install_sigint, make_scanner
 
-running = True
+LOG_FILE = Path('log.csv')
+# start time, length, name, frequency, modulation, tone code
+LOG_TEMPLATE = '%s,%.1f,%s,%d,%s,%s\n'
+# coarsest poll period that still reliably catches squelch edges, the scanner takes tens of ms to respond anyway
+POLL_INTERVAL_S = 0.02
+# while receiving only the reception status is polled, the screen is refreshed at this slower period
+STATUS_INTERVAL_S = 0.5
 
+stop_event = Event()
 
-def exit_gracefully(sig_num, frame):
-    """Handles a keyboard interrupt to shut down the script."""
-    global running
-    print('Quitting...')
-    running = False
+
+def redraw(lines: list[str], last_lines: list[str]) -> str:
+    """Builds the output to redraw the screen printed above the cursor, only rewriting lines that changed, if any."""
+    n = len(last_lines)
+    if len(lines) != n:
+        # with no previous lines there is nothing to move up over and clear
+        clear = f'\033[{n}F\033[J' if n else ''
+        return clear + ''.join([f'{line}\n' for line in lines])
+
+    # move up to each changed line, replace it, then return to below the screen
+    return ''.join(f'\033[{n - i}F\033[2K{line}\033[{n - i}E'
+                   for i, (line, last) in enumerate(zip(lines, last_lines)) if line != last)
 
 
 # find a scanner either from a given address or scanning
-port = argv[1] if len(argv) > 1 else ''
-bc = detect_scanner(port)
+bc = make_scanner(argv)
+
+install_sigint(stop_event)
 
-signal.signal(signal.SIGINT, exit_gracefully)
+# keep the log open for the life of the script rather than reopening it for each transmission
+log = LogFile()
 
 # print screen once, future prints will overlap this one
-screen = bc.get_status()[0]
-print(screen)
-last_line_count = len(screen.lines)
+last_lines = [str(line) for line in bc.get_status()[0].lines]
+print('\n'.join(last_lines), flush=True)
 
 started_at = 0
+next_status_at = 0
 receiving = None
-while running:
-    # print the screen on top of previous prints
-    screen, squelch, _ = bc.get_status()
-    print(f'\033[{last_line_count}F' + str(screen))
-    last_line_count = len(screen.lines)
+while not stop_event.is_set():
+    polled_at = datetime.now()
+    if receiving and monotonic() < next_status_at:
+        # only the end of squelch matters while receiving, so skip the much larger screen status
+        screen = None
+        state, squelch, _ = bc.get_reception_status()
+    else:
+        # fetch the screen and reception state with a single round-trip
+        (screen, _, _), (state, squelch, _) = bc.get_status_and_reception()
+        next_status_at = monotonic() + STATUS_INTERVAL_S
+
+    # print the screen on top of previous prints, only when it has changed
+    if screen:
+        lines = [str(line) for line in screen.lines]
+        output = redraw(lines, last_lines)
+        if output:
+            # write straight to the terminal, bypassing print and the stdout buffer
+            os.write(1, output.encode())
+            last_lines = lines
 
     # detect squelch start
     if squelch and not receiving:
-        started_at = datetime.now()
-        receiving, _, _ = bc.get_reception_status()
+        started_at = polled_at
+        receiving = state
     # detect squelch end
     elif not squelch and receiving:
-        length = (datetime.now() - started_at).total_seconds(0)
+        length = (polled_at - started_at).total_seconds()
         if length > 0.5:
-            with open(LOG_FILE, 'a') as f:
-                f.write(f'{started_at},{round(length, 1)},{receiving.name},{receiving.frequency},{receiving.modulation.value},{receiving.tone_code}\n')
+            log.write(LOG_FILE, LOG_TEMPLATE % (started_at, length, receiving.name, receiving.frequency,
+                                                receiving.modulation.value, receiving.tone_code))
 
         receiving = None
 
-    sleep(0.001)
+    # returns immediately when interrupted
+    stop_event.wait(POLL_INTERVAL_S)
+
+log.close()
@@ -1,18 +1,19 @@
 """Populate a BC125AT banks with channels from a CSV file."""
+import csv
 from sys import argv
 from pathlib import Path
 
 from bearcat.classes import Modulation, Channel
-from bearcat.tools import detect_scanner
+
+from _common import make_scanner
 
 
 # filters to select channels by using the first column
-SELECT_FROM = ['NASCAR', 'CUP', 'OAPS', 'ARCA']
+SELECT_FROM = frozenset({'NASCAR', 'CUP', 'OAPS', 'ARCA'})
 FILE_DIR = Path('/channels')
 
 # find a scanner either from a given address or scanning
-port = argv[1] if len(argv) > 1 else ''
-bc = detect_scanner(port)
+bc = make_scanner(argv)
 
 count = 0
 groups = {}
@@ -20,16 +21,22 @@ last_section = ''
 total_channels = bc.TOTAL_CHANNELS
 band_size = total_channels // 10
 for file in FILE_DIR.glob('*.csv'):
-    with open(file, 'r') as f:
+    with open(file, 'r', buffering=65536, newline='') as f:
+        reader = csv.reader(f)
         # skip the first line of the file
-        sline = f.readline()
+        next(reader, None)
 
-        while sline:
-            sline = f.readline()
-            line = [c.strip() for c in sline.strip().strip(',').split(',')]
+        for row in reader:
+            # skip sections not in SELECT_FROM before parsing the rest of the line
+            if not row or (SELECT_FROM and row[0].strip() not in SELECT_FROM):
+                continue
 
-            # ignore unpopulated lines
+            # drop trailing empty columns
+            line = [c.strip() for c in row]
+            while line and not line[-1]:
+                line.pop()
 
+            # ignore unpopulated lines
             if len(line) >= 4 and line[0]:
                 section = line[0]
                 number = line[1]
@@ -44,10 +51,6 @@ for file in FILE_DIR.glob('*.csv'):
                     if first_name:
                         name += f' {first_name}'
 
-                # skip sections not in SELECT_FROM
-                if SELECT_FROM and section not in SELECT_FROM:
-                    continue
-
                 for i in range(4, len(line), 2):
                     index = (i - 2) // 2
                     frequency = line[i]
@@ -80,7 +83,7 @@ for file in FILE_DIR.glob('*.csv'):
 
                     # build channel index
                     count += 1
-                    channel = Channel(count, chan_name, int(float(frequency) * 1e6), Modulation.NFM, bc.TONE_MAP[tone], lockout=False)
+                    channel = Channel(count, chan_name, round(float(frequency) * 1e6), Modulation.NFM, bc.TONE_MAP[tone], lockout=False)
 
                     group = f'{section}-{index}' if number else section
                     if group not in groups:
@@ -129,15 +132,13 @@ for group, numbers in groups.items():
     # jump to start of next group
     channel_num = (channel_num // band_size + 1) * band_size
 
-# init scanner connection
-bc.enter_program_mode()
-
-# add all new channels, delete others
-for i in range(1, total_channels + 1):
-    if i in channels:
-        print(channels[i])
-        bc.update_channel(channels[i])
-    else:
-        bc.clear_channel(i)
+for i in sorted(channels):
+    print(channels[i])
 
-bc.exit_program_mode()
+# write only the channels that changed and delete only the unused channels that aren't already empty
+with bc.program_mode():
+    bc.update_channels([channels[i] for i in sorted(channels) if i <= total_channels])
+    unused = [i for i in range(1, total_channels + 1) if i not in channels]
+    stale = [Channel(c.index) for c in bc.get_channel_infos(unused) if c.name or c.frequency]
+    if stale:
+        bc.bulk_set_channels(stale)
@@ -1,18 +1,41 @@
 """Populate a BC125AT banks with channels from a CSV file."""
+import csv
+from functools import lru_cache
 from sys import argv
 from pathlib import Path
 
 from bearcat.classes import Modulation, Channel
-from bearcat.tools import detect_scanner
+
+from _common import make_scanner
 
 
 # filters to select channels by using the first column
-SELECT_FROM = ['NWS', 'LOCAL']
+SELECT_FROM = frozenset({'NWS', 'LOCAL'})
 FILE_DIR = Path('/channels')
 
+
+@lru_cache(maxsize=None)
+def _format_chan_name(name: str, number: str, index: str) -> str:
+    """Formats a channel name as "NAME NUMBER-INDEX" within the 16 character limit."""
+    # by default channels are named "NAME NUMBER-INDEX" so name is limited to 11 characters
+    name_len = 11
+    number_str = f' {number.rjust(2)}'
+    index_str = f'-{index}'
+    # if no index, increase limit to 13
+    if not index:
+        name_len += 2
+        index_str = ''
+        # if no number, allow full 16 characters to be used
+        if not number:
+            name_len = 16
+            number_str = ''
+
+    name = name[:min(name_len, len(name))].ljust(name_len)
+    return f'{name}{number_str}{index_str}'
+
+
 # find a scanner either from a given address or scanning
-port = argv[1] if len(argv) > 1 else ''
-bc = detect_scanner(port)
+bc = make_scanner(argv)
 
 i = 0
 chans = {}
@@ -20,83 +43,64 @@ last_section = ''
 total_channels = bc.TOTAL_CHANNELS
 band_size = total_channels // 10
 for file in FILE_DIR.glob('*.csv'):
-    with open(file, 'r') as f:
+    with open(file, 'r', buffering=65536, newline='') as f:
+        reader = csv.reader(f)
         # skip the first line of the file
-        sline = f.readline()
+        next(reader, None)
+
+        for row in reader:
+            # ignore malformed lines
+            if len(row) < 7:
+                continue
+
+            # skip sections not in SELECT_FROM before parsing the rest of the line
+            section = row[0].strip()
+            if not section or (SELECT_FROM and section not in SELECT_FROM):
+                continue
 
-        while sline:
-            sline = f.readline()
-            line = [c.strip() for c in sline.split(',')]
+            number, index, name, secondary_name, frequency, tone = (c.strip() for c in row[1:7])
+            modulation = row[7].strip() if len(row) > 7 else ''
 
             # ignore unpopulated lines
-            if len(line) >= 7 and line[0] and line[5]:
-                section = line[0]
-                number = line[1]
-                index = line[2]
-                name = line[3]
-                secondary_name = line[4]
-                frequency = line[5]
-                tone = line[6]
-                modulation = line[7] if len(line) > 7 else ''
-
-                # skip sections not in SELECT_FROM
-                if SELECT_FROM and section not in SELECT_FROM:
-                    continue
-
-                # detect section changes, go to next bank
-                if section != last_section:
-                    if last_section:
-                        i += band_size - i % band_size
-
-                    last_section = section
-
-                # increment channel number, prevent exceeding last channel
-                i += 1
-                if i > total_channels:
-                    break
-
-                # if no name was provided use section name
-                if not name:
-                    name = section
-
-                # by default channels are named "NAME NUMBER-INDEX" so name is limited to 11 characters
-                name_len = 11
-                number_str = f' {number.rjust(2)}'
-                index_str = f'-{index}'
-                # if no index, increase limit to 13
-                if not index:
-                    name_len += 2
-                    index_str = ''
-                    # if no number, allow full 16 characters to be used
-                    if not number:
-                        name_len = 16
-                        number_str = ''
-
-                name = name[:min(name_len, len(name))].ljust(name_len)
-                chan_name = f'{name}{number_str}{index_str}'
-
-                # expects CTCSS/DCS frequency/codes
-                try:
-                    tone = float(tone)
-                except ValueError:
-                    tone = tone.upper()
-
-                mod = Modulation.NFM
-                if modulation:
-                    mod = Modulation(modulation.upper())
-
-                chan = Channel(i, chan_name, int(float(frequency) * 1e6), mod, bc.TONE_MAP[tone], lockout=False)
-                print(chan)
-                chans[i - 1] = chan
-
-# init scanner connection
-bc.enter_program_mode()
-
-# add all new channels, delete others
-for i in range(total_channels):
-    if i in chans:
-        bc.update_channel(chans[i])
-    else:
-        bc.clear_channel(i + 1)
-
-bc.exit_program_mode()
+            if not frequency:
+                continue
+
+            # detect section changes, go to next bank
+            if section != last_section:
+                if last_section:
+                    i += band_size - i % band_size
+
+                last_section = section
+
+            # increment channel number, prevent exceeding last channel
+            i += 1
+            if i > total_channels:
+                break
+
+            # if no name was provided use section name
+            if not name:
+                name = section
+
+            chan_name = _format_chan_name(name, number, index)
+
+            # expects CTCSS/DCS frequency/codes
+            try:
+                tone = float(tone)
+            except ValueError:
+                tone = tone.upper()
+
+            mod = Modulation.NFM
+            if modulation:
+                mod = Modulation(modulation.upper())
+
+            chan = Channel(i, chan_name, round(float(frequency) * 1e6), mod, bc.TONE_MAP[tone], lockout=False)
+            print(chan)
+            chans[i] = chan
+
+# write only the channels that changed and delete only the unused channels that aren't already empty
+with bc.program_mode():
+    bc.update_channels(list(chans.values()))
+    unused = [i for i in range(1, total_channels + 1) if i not in chans]
+    stale = [Channel(c.index) for c in bc.get_channel_infos(unused) if c.name or c.frequency]
+    if stale:
+        bc.bulk_set_channels(stale)
@@ -1,27 +1,24 @@
 """Reads a BC125AT scanner's channel bank configuration."""
+import csv
 from sys import argv
 
-from bearcat.tools import detect_scanner
-from bearcat.classes import Channel
+from _common import make_scanner
 
 
 CHANNEL_FILE = 'backup.csv'
 
 # find a scanner either from a given address or scanning
-port = argv[1] if len(argv) > 1 else ''
-bc = detect_scanner(port)
+bc = make_scanner(argv)
 
-tones = list(bc.TONE_MAP.keys())
-tone_codes = list(bc.TONE_MAP.values())
-
-bc.enter_program_mode()
-with open(CHANNEL_FILE, 'w') as f:
-    f.write('Group,Number,Index,Name,Secondary Name,Frequency (MHz),Tone,Modulation\n')
-    for i in range(bc.TOTAL_CHANNELS):
-        chan: Channel = bc.get_channel_info(i + 1)
+with open(CHANNEL_FILE, 'w', buffering=65536, newline='') as f:
+    writer = csv.writer(f)
+    writer.writerow(['Group', 'Number', 'Index', 'Name', 'Secondary Name', 'Frequency (MHz)', 'Tone', 'Modulation'])
+    rows = []
+    for chan in bc.iter_channel_infos():
         if chan.frequency:
             print(chan)
-            tone = tones[tone_codes.index(chan.tone_code)]
-            f.write(f'IMPORT,,{chan.index},{chan.name},,{chan.frequency / 1e6},{chan.tone_code},{chan.modulation.value}\n')
+            # write the tone the way populate.py expects it, falling back to the raw code for unknown codes
+            tone = bc.TONE_CODE_MAP.get(chan.tone_code, chan.tone_code)
+            rows.append(['IMPORT', '', chan.index, chan.name, '', chan.frequency / 1e6, tone, chan.modulation.value])
 
-bc.exit_program_mode()
+    writer.writerows(rows)
@@ -1,18 +1,19 @@
 """Monitors the scanner and records audio on squelch."""
-import signal
 import warnings
 import numpy as np
 from sys import argv
 from pathlib import Path
 from typing import Optional
-from threading import Thread
+from queue import Empty, Queue
+from threading import Event, Thread
 from datetime import datetime
 from soundfile import SoundFile
-from time import sleep, monotonic
+from time import monotonic
 from sounddevice import Stream, query_devices
 
 from bearcat.classes import RadioState
-from bearcat.tools import detect_scanner
+
+from _common import AdaptiveInterval, LogFile, install_sigint, make_scanner
 
 
 warnings.simplefilter(action='ignore', category=FutureWarning)
@@ -20,14 +21,20 @@ warnings.simplefilter(action='ignore', category=UserWarning)
 
 RECORDING_DIR = Path('/home/liam/workspace/bearcat/recordings')
 LOG_FILE = Path('/home/liam/workspace/bearcat/log-DATE.csv')
+# start time, length, name, frequency, modulation, tone code
+LOG_TEMPLATE = '%s,%.1f,%s,%d,%s,%s\n'
 
 SAMPLE_RATE = 44100
 BLOCK_SIZE = 4096
 NUM_CHANNELS = 2
+DTYPE = np.float32
 VOCAB = ''
+# number of audio blocks the callback can get ahead of the processing thread by
+RING_BLOCKS = 64
+# how often the processing thread checks for completed recordings
+POLL_INTERVAL_S = 0.02
 
-queue = []
-running = True
+stop_event = Event()
 
 assert len(argv) > 1, "Script requires one argument, the address of the scanner."
 
@@ -36,10 +43,15 @@ class Recording:
     """Object representing a recording."""
 
     def __init__(self, radio_state: RadioState):
-        self.audio_buffer = []
+        self.frames = 0
+        self.file: Optional[SoundFile] = None
+        self.closed = False
         self.radio_state = radio_state
         self.started_at = datetime.now()
         self.stopped_at: Optional[datetime] = None
+        # the state and start time never change, so build the file name once
+        name = radio_state.name.replace(' ', '_') if radio_state.name else radio_state.frequency / 1e6
+        self.name = f'{name}_{self.started_at.strftime("%Y-%m-%d_%H:%M:%S")}.wav'
         print(self.name, 'started')
 
     @property
@@ -54,105 +66,159 @@ class Recording:
 
     @property
     def audio_length(self):
-        """Determines the length of the recorded audio based on the buffer size."""
-        return len(self.audio_buffer) * BLOCK_SIZE / SAMPLE_RATE
-
-    @property
-    def name(self):
-        """Builds the recording file name using frequency and start time."""
-        name = self.radio_state.name.replace(' ', '_') if self.radio_state.name else self.radio_state.frequency / 1e6
-        return f'{name}_{self.started_at.strftime("%Y-%m-%d_%H:%M:%S")}.wav'
+        """Determines the length of the recorded audio based on the number of samples recorded."""
+        return self.frames / SAMPLE_RATE
 
     def stop(self):
         """Marks the end of the recording."""
         self.stopped_at = datetime.now()
         print(self.name, 'stopped')
 
-    def add_samples(self, samples):
-        """Add given samples to the recording."""
-        self.audio_buffer.append(samples.copy())
+    def write(self, samples):
+        """Appends given samples to the recording's file, opening it on the first write."""
+        if self.closed:
+            return
+
+        if self.file is None:
+            self.file = SoundFile(RECORDING_DIR / self.name, mode='w', samplerate=SAMPLE_RATE, channels=NUM_CHANNELS)
 
+        self.file.write(samples)
 
-def exit_gracefully(_, __):
-    """Handles a keyboard interrupt to shut down the script."""
-    global running
-    print('Quitting...')
-    running = False
+    def close(self):
+        """Closes the recording's file, no more samples are written after."""
+        self.closed = True
+        if self.file is not None:
+            self.file.close()
 
 
 def handle_audio(in_data, out_data, __, ___, ____):
     """Callback for handling new audio samples."""
-    # if recording, cache samples in recording object
-    if queue:
-        rec = queue[-1]
-        if rec.is_recording or rec.audio_length < rec.length:
-            # loopback audio to output device
-            out_data[:] = in_data
-
-            rec.add_samples(in_data.copy())
-        else:
-            out_data[:] = np.zeros(out_data.shape)
+    global ring_written
+    # if recording, copy samples into the ring, the active recording is only ever replaced by the main thread
+    rec = active_rec
+    if rec is not None and (rec.is_recording or rec.audio_length < rec.length):
+        # loopback audio to output device
+        out_data[:] = in_data
+
+        slot = ring_written % RING_BLOCKS
+        ring[slot] = in_data
+        ring_owners[slot] = rec
+        # publish the block before counting it, so a recording is never seen as complete with blocks left unread
+        ring_written += 1
+        rec.frames += len(in_data)
     else:
-        out_data[:] = np.zeros(out_data.shape)
+        out_data.fill(0)
 
 
-def process_thread():
-    """
-    Monitors the recording queue for completed recordings. Saves the recordings to file, then transcribes and logs them.
-    """
-    global running
-    print('Processing thread started')
-    while running:
-        if queue and not queue[0].is_recording:
-            rec = queue.pop(0)
+def finish(rec: Recording):
+    """Closes a completed recording, then logs it or deletes it if it was too short."""
+    rec.close()
+    print(f'Recorded for {rec.length}s, got {rec.audio_length}s')
+    name = RECORDING_DIR / rec.name
+
+    if rec.length >= 0.6:
+        print(f'Saved recording {name}')
+        log.write(Path(str(LOG_FILE).replace('DATE', rec.started_at.strftime('%Y-%m-%d'))),
+                  LOG_TEMPLATE % (rec.started_at, rec.length, rec.radio_state.name, rec.radio_state.frequency,
+                                  rec.radio_state.modulation.value, rec.radio_state.tone_code))
+        print('Wrote to log')
+    elif rec.file is not None:
+        name.unlink()
 
-            print(f'Recorded for {rec.length}s, got {rec.audio_length}s')
-            name = RECORDING_DIR / rec.name
 
-            if rec.length >= 0.6:
-                file = SoundFile(name, mode='w', samplerate=SAMPLE_RATE, channels=NUM_CHANNELS)
-                for frame in rec.audio_buffer:
-                    file.write(frame)
+def flush_ring(ring_read: int) -> int:
+    """Writes all blocks in the ring after a given read position to their recordings, returns the new position."""
+    if ring_written - ring_read > RING_BLOCKS:
+        print(f'Dropped {ring_written - ring_read - RING_BLOCKS} audio blocks')
+        ring_read = ring_written - RING_BLOCKS
 
-                print(f'Saved recording {name}')
-                with open(str(LOG_FILE).replace('DATE', rec.started_at.strftime('%Y-%m-%d')), 'a') as f:
-                    f.write(f'{rec.started_at},{round(rec.length, 1)},{rec.radio_state.name},{rec.radio_state.frequency},{rec.radio_state.modulation.value},{rec.radio_state.tone_code}\n')
-                    print('Wrote to log')
+    while ring_read < ring_written:
+        slot = ring_read % RING_BLOCKS
+        ring_owners[slot].write(ring[slot])
+        ring_read += 1
 
-        sleep(0.001)
+    return ring_read
 
 
+def process_thread():
+    """
+    Streams recorded audio from the ring into each recording's file as it arrives, so only the ring is held in
+    memory. Logs recordings once they are complete.
+    """
+    print('Processing thread started')
+    ring_read = 0
+    stopped: list[Recording] = []
+    try:
+        while not stop_event.is_set():
+            try:
+                stopped.append(completed_q.get(timeout=POLL_INTERVAL_S))
+            except Empty:
+                pass
+
+            # a stopped recording is complete once the callback is no longer adding to it
+            completed = [r for r in stopped if r is not active_rec or r.audio_length >= r.length]
+
+            ring_read = flush_ring(ring_read)
+
+            for rec in completed:
+                stopped.remove(rec)
+                finish(rec)
+    finally:
+        # write out what is left in the ring, then finish every recording still open at shutdown
+        flush_ring(ring_read)
+        while not completed_q.empty():
+            stopped.append(completed_q.get_nowait())
+
+        rec = active_rec
+        if rec is not None and not rec.closed and rec not in stopped:
+            if rec.is_recording:
+                rec.stop()
+            stopped.append(rec)
+
+        for rec in stopped:
+            finish(rec)
+        print('Processing thread stopped')
+
+
+ring = np.zeros((RING_BLOCKS, BLOCK_SIZE, NUM_CHANNELS), dtype=DTYPE)
+ring_owners: list[Optional[Recording]] = [None] * RING_BLOCKS
+ring_written = 0
+active_rec: Optional[Recording] = None
+completed_q: Queue = Queue()
+log = LogFile()
+
 print(query_devices())
 in_device = int(input('Desired input device: '))
 out_device = int(input('Desired output device: '))
 stream = Stream(samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE, device=(in_device, out_device), channels=NUM_CHANNELS,
-                callback=handle_audio)
+                dtype=DTYPE, callback=handle_audio)
 stream.start()
 print('Audio stream started')
 
 # find a scanner
-port = argv[1] if len(argv) > 1 else ''
-bc = detect_scanner(port)
+bc = make_scanner(argv)
 
-signal.signal(signal.SIGINT, exit_gracefully)
+install_sigint(stop_event)
 
 Thread(target=process_thread).start()
 
-while running:
+poll_interval = AdaptiveInterval()
+while not stop_event.is_set():
     start = monotonic()
     state, squelch, muted = bc.get_reception_status()
 
     # detect squelch start
-    if squelch and not muted and not (queue and queue[-1].is_recording):
-        queue.append(Recording(state))
+    if squelch and not muted and not (active_rec and active_rec.is_recording):
+        active_rec = Recording(state)
     # detect squelch end
-    elif not squelch and (queue and queue[-1].is_recording):
-        queue[-1].stop()
+    elif not squelch and (active_rec and active_rec.is_recording):
+        active_rec.stop()
+        completed_q.put(active_rec)
 
-    # query every 200 ms
-    rem_time = 0.2 - (monotonic() - start) - 0.001
+    # query more often while receiving so the end of squelch is caught quickly
+    rem_time = poll_interval.update(squelch) - (monotonic() - start)
     if rem_time > 0:
-        sleep(rem_time)
+        stop_event.wait(rem_time)
 
 stream.stop()
 stream.close()
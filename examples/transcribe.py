@@ -1,16 +1,19 @@
 """Monitors the scanner, records audio on squelch, and transcribes the audio."""
-import signal
 #import whisper
 import warnings
 import numpy as np
 from pathlib import Path
-from threading import Thread
+from queue import Empty, Queue
+from threading import Event, Thread
 from datetime import datetime
 from soundfile import SoundFile
-from time import sleep, monotonic
+from time import monotonic
 from sounddevice import Stream, query_devices
 
-from bearcat import RadioState, find_scanners, detect_scanner
+from bearcat.classes import RadioState
+from bearcat.tools import find_scanners, get_reception_statuses
+
+from _common import AdaptiveInterval, LogFile, install_sigint
 
 
 warnings.simplefilter(action='ignore', category=FutureWarning)
@@ -18,6 +21,8 @@ warnings.simplefilter(action='ignore', category=UserWarning)
 
 RECORDING_DIR = Path('/home/liam/bearcat/recordings')
 LOG_DIR = Path('/home/liam/bearcat/logs')
+# start time, duration, name, frequency, modulation, tone code, transcription
+LOG_TEMPLATE = '%s,%.1f,%s,%d,%s,%s,"%s"\n'
 
 SAMPLE_RATE_HZ = 48000
 BLOCK_SIZE_S = 0.1
@@ -25,8 +30,12 @@ NUM_STREAMS = 4
 ALLOWED_GAP = 4
 DTYPE = np.float32
 MONITOR = True
+# initial length of each recording's buffer, grown as needed
+BUFFER_SECONDS = 30
 
 BLOCK_SIZE = int(SAMPLE_RATE_HZ * BLOCK_SIZE_S // NUM_STREAMS * NUM_STREAMS)
+# number of audio blocks the callback can get ahead of the record thread by
+RING_BLOCKS = 32
 
 
 class Recorder:
@@ -34,13 +43,25 @@ class Recorder:
     def __init__(self, channel: int, state: RadioState):
         self.radio_index = channel
         self.radio_state = state
-        self.buffer = np.array([], dtype=DTYPE)
+        self.buffer = np.empty(SAMPLE_RATE_HZ * BUFFER_SECONDS, dtype=DTYPE)
+        self.write_idx = 0
         self.start_time = datetime.now()
-        self.stopped_at = 0
+        self.stopped_at = None
+        # the state and start time never change, so build the strings once
+        self.short_state = f'{state.frequency / 1e6} {state.name}'
+        self.name = f'{self.start_time.strftime("%y%m%d-%H%M%S")} {self.short_state}.wav'
         print(f'starting {self.radio_index}: {self.short_state}')
 
     def add_samples(self, samples):
-        self.buffer = np.concatenate((self.buffer, samples[:, self.radio_index].copy()))
+        # copy into the preallocated buffer, only reallocating (doubling) when it is full
+        n = len(samples)
+        if self.write_idx + n > len(self.buffer):
+            grown = np.empty(2 * len(self.buffer) + n, dtype=DTYPE)
+            grown[:self.write_idx] = self.buffer[:self.write_idx]
+            self.buffer = grown
+
+        self.buffer[self.write_idx:self.write_idx + n] = samples[:, self.radio_index]
+        self.write_idx += n
 
     def compare_state(self, state: RadioState) -> bool:
         return state.frequency == self.radio_state.frequency
@@ -48,9 +69,9 @@ class Recorder:
     @property
     def audio(self) -> np.ndarray:
         if self.is_recording:
-            return self.buffer
+            return self.buffer[:self.write_idx]
         else:
-            return self.buffer[:-SAMPLE_RATE_HZ * ALLOWED_GAP]
+            return self.buffer[:max(self.write_idx - SAMPLE_RATE_HZ * ALLOWED_GAP, 0)]
 
     @property
     def duration(self) -> float:
@@ -58,123 +79,165 @@ class Recorder:
 
     @property
     def is_recording(self) -> bool:
-        return not self.is_stopped or len(self.buffer) - self.stopped_at < ALLOWED_GAP * SAMPLE_RATE_HZ
+        return not self.is_stopped or self.write_idx - self.stopped_at < ALLOWED_GAP * SAMPLE_RATE_HZ
 
     @property
     def is_stopped(self) -> bool:
-        return self.stopped_at > 0
-
-    @property
-    def name(self) -> str:
-        return f'{self.start_time.strftime("%y%m%d-%H%M%S")} {self.short_state}.wav'
-
-    @property
-    def short_state(self) -> str:
-        return f"{self.radio_state.frequency / 1e6} {self.radio_state.name}"
+        return self.stopped_at is not None
 
     def stop(self):
         print(f'stopping {self.radio_index}: {self.short_state}')
-        self.stopped_at = len(self.buffer)
+        self.stopped_at = self.write_idx
 
     def resume(self):
         print(f'resuming {self.radio_index}: {self.short_state}')
-        self.stopped_at = 0
-
-
-def exit_gracefully(_, __):
-    """Handles a keyboard interrupt to shut down the script."""
-    global running
-    print('Quitting...')
-    running = False
+        self.stopped_at = None
 
 
 def audio_handler(in_data, out_data, __, ___, ____):
     """Callback for handling new audio samples."""
-    # loopback audio to output device
+    global ring_written
+    # loopback audio to output device, the mean of all streams scaled by the number of streams is just their sum
     if MONITOR:
-        out_data[:] = np.mean(in_data, 1, keepdims=True) * len(squelched)
-
-    recs = {}
-    for r in recorders:
-        if r.is_recording and r.radio_index not in recs:
-            recs[r.radio_index] = r
-
-    for i, sq in enumerate(squelched):
-        if sq and (i not in recs or not recs[i].compare_state(sq)):
-            if i in recs and not recs[i].is_stopped:
-                recs[i].stop()
-
-            rec = Recorder(i, sq)
-            rec.add_samples(in_data)
-            recorders.insert(0, rec)
-        else:
-            if sq and i in recs and recs[i].compare_state(sq) and recs[i].is_stopped:
-                recs[i].resume()
-            elif not sq and i in recs and not recs[i].is_stopped:
-                recs[i].stop()
-
-            if i in recs and recs[i].is_recording:
-                recs[i].add_samples(in_data)
-
-
-def process_thread():
+        np.sum(in_data, axis=1, out=out_data[:, 0])
+
+    # only copy the block into the ring, the record thread hands it to the recorders
+    ring[ring_written % RING_BLOCKS] = in_data
+    ring_written += 1
+    blocks_ready.set()
+
+
+def record_thread():
+    """Drains audio blocks from the ring into the recorders, keeping that work out of the audio callback."""
+    print('Record thread started')
+    ring_read = 0
+    while not stop_event.is_set():
+        if ring_read == ring_written:
+            # sleep until the callback writes another block rather than polling the ring
+            blocks_ready.wait(BLOCK_SIZE_S)
+            blocks_ready.clear()
+            continue
+
+        if ring_written - ring_read > RING_BLOCKS:
+            print(f'Dropped {ring_written - ring_read - RING_BLOCKS} audio blocks')
+            ring_read = ring_written - RING_BLOCKS
+
+        block = ring[ring_read % RING_BLOCKS]
+        # recorders are only started and stopped by the polling thread, here they are just looked up by stream
+        for i in range(NUM_STREAMS):
+            rec = recorders.get(i)
+            if rec is not None and rec.is_recording:
+                rec.add_samples(block)
+
+        ring_read += 1
+
+
+def update_recorder(index: int, state):
+    """Starts, stops, or resumes the recorder of a stream using its latest reception state, from the polling thread."""
+    rec = recorders.get(index)
+    if state and (rec is None or not rec.compare_state(state)):
+        # a new frequency took over the stream, complete the previous recording where it left off
+        if rec is not None:
+            if not rec.is_stopped:
+                rec.stop()
+
+            completed_q.put(rec)
+
+        recorders[index] = Recorder(index, state)
+    elif rec is not None:
+        if state and rec.is_stopped:
+            rec.resume()
+        elif not state and not rec.is_stopped:
+            rec.stop()
+
+        if not rec.is_recording:
+            del recorders[index]
+            completed_q.put(rec)
+
+
+def save_thread():
     """
-    Monitors the recording queue for completed recordings. Saves the recordings to file, then transcribes and logs them.
+    Saves completed recordings to file, then queues them to be transcribed and logged so that slow transcriptions
+    never delay saving the next recording.
     """
-    global running
-    print('Processing thread started')
-    while running:
-        completed = [i for i, rec in enumerate(recorders) if not rec.is_recording]
-        if completed:
-            rec = recorders.pop(completed[-1])
+    print('Save thread started')
+    try:
+        while not stop_event.is_set() or not completed_q.empty():
+            try:
+                rec = completed_q.get(timeout=0.1)
+            except Empty:
+                continue
+
             print(f'Recorded for {rec.duration}s')
             name = RECORDING_DIR / rec.name
 
-            text = ''
             if rec.duration >= 1.0:
                 with SoundFile(name, mode='w', samplerate=SAMPLE_RATE_HZ, channels=1) as f:
                     f.write(rec.audio)
 
-                print(f'Saved recording {name}, transcribing...')
-                # try:
-                #     transcription_start = monotonic()
-                #     transcription = model.transcribe(str(name), initial_prompt='')
-                #     transcribe_time = monotonic() - transcription_start
-                #     transcription_ratio = transcribe_time / rec.duration
-                #
-                #     text = transcription['text']
-                #     words_per_second = len(text.split()) / rec.duration
-                #     print('Heard:', text, f'({words_per_second} wps, {transcription_ratio})')
-                #
-                #     if any(ord(c) > 128 for c in text):
-                #         text = ''
-                #         print('Threw out transcription, non-english character')
-                #     elif transcription['language'] != 'en':
-                #         text = ''
-                #         print('Threw out transcription, not english')
-                #     elif words_per_second > 5:
-                #         text = ''
-                #         print('Threw out transcription, too wordy')
-                #     elif transcription_ratio > 30:
-                #         text = ''
-                #         print('Threw out transcription, took too long')
-                #     elif len(text) < 15 and 'thank you' in text.lower():
-                #         print('Threw out transcription, "thank you"')
-                # except KeyError:
-                #     print('KeyError transcribing')
-                # except RuntimeError:
-                #     print('RuntimeError transcribing')
-
-            with open(LOG_DIR / f"{rec.start_time.strftime('%Y-%m-%d')}.csv", 'a') as f:
-                f.write(f'{rec.start_time},{round(rec.duration, 1)},{rec.radio_state.name},{rec.radio_state.frequency},{rec.radio_state.modulation.value},{rec.radio_state.tone_code},"{text}"\n')
-                print('Wrote to log')
-
-        sleep(0.1)
-
-
-squelched = [False] * NUM_STREAMS
-recorders: list[Recorder] = []
-running = True
+                print(f'Saved recording {name}')
+
+            transcribe_queue.put((rec, name))
+    finally:
+        # tell the transcription thread that no more recordings are coming
+        transcribe_queue.put(None)
+
+
+def transcribe_thread():
+    """Transcribes saved recordings from the transcription queue and logs them, until the save thread finishes."""
+    print('Transcription thread started')
+    while True:
+        item = transcribe_queue.get()
+        if item is None:
+            break
+
+        rec, name = item
+        text = ''
+        if rec.duration >= 1.0:
+            print(f'Transcribing {name}...')
+            # try:
+            #     transcription_start = monotonic()
+            #     transcription = model.transcribe(str(name), initial_prompt='')
+            #     transcribe_time = monotonic() - transcription_start
+            #     transcription_ratio = transcribe_time / rec.duration
+            #
+            #     text = transcription['text']
+            #     words_per_second = len(text.split()) / rec.duration
+            #     print('Heard:', text, f'({words_per_second} wps, {transcription_ratio})')
+            #
+            #     if any(ord(c) > 128 for c in text):
+            #         text = ''
+            #         print('Threw out transcription, non-english character')
+            #     elif transcription['language'] != 'en':
+            #         text = ''
+            #         print('Threw out transcription, not english')
+            #     elif words_per_second > 5:
+            #         text = ''
+            #         print('Threw out transcription, too wordy')
+            #     elif transcription_ratio > 30:
+            #         text = ''
+            #         print('Threw out transcription, took too long')
+            #     elif len(text) < 15 and 'thank you' in text.lower():
+            #         print('Threw out transcription, "thank you"')
+            # except KeyError:
+            #     print('KeyError transcribing')
+            # except RuntimeError:
+            #     print('RuntimeError transcribing')
+
+        log.write(LOG_DIR / f"{rec.start_time.strftime('%Y-%m-%d')}.csv",
+                  LOG_TEMPLATE % (rec.start_time, rec.duration, rec.radio_state.name, rec.radio_state.frequency,
+                                  rec.radio_state.modulation.value, rec.radio_state.tone_code, text))
+        print('Wrote to log')
+
+
+ring = np.zeros((RING_BLOCKS, BLOCK_SIZE, NUM_STREAMS), dtype=DTYPE)
+ring_written = 0
+blocks_ready = Event()
+recorders: dict[int, Recorder] = {}
+completed_q: Queue = Queue()
+transcribe_queue: Queue = Queue()
+log = LogFile()
+stop_event = Event()
 
 print(query_devices())
 in_device = int(input('Desired input device: '))
@@ -192,21 +255,26 @@ if len(bcs) == 0:
     print('No scanners found')
     exit(1)
 
-signal.signal(signal.SIGINT, exit_gracefully)
+install_sigint(stop_event)
 
-Thread(target=process_thread).start()
+Thread(target=record_thread).start()
+Thread(target=save_thread).start()
+Thread(target=transcribe_thread).start()
 
-while running:
+poll_interval = AdaptiveInterval()
+while not stop_event.is_set():
     start = monotonic()
 
-    for i, bc in enumerate(bcs):
-        state, squelch, muted = bc.get_reception_status()
-        squelched[i] = state if squelch else False
+    # query every scanner before waiting on any of their responses
+    any_squelch = False
+    for i, (state, squelch, muted) in enumerate(get_reception_statuses(bcs)):
+        update_recorder(i, state if squelch else False)
+        any_squelch = any_squelch or squelch
 
-    # query every 200 ms
-    rem_time = 0.2 - (monotonic() - start) - 0.001
+    # query more often while receiving so the end of squelch is caught quickly
+    rem_time = poll_interval.update(any_squelch) - (monotonic() - start)
     if rem_time > 0:
-        sleep(rem_time)
+        stop_event.wait(rem_time)
 
 stream.stop()
 stream.close()
@@ -1,13 +1,27 @@
 """Contains the base Bearcat class and functions used to detect and connect to scanners."""
+import re
 import socket
 import serial
+import selectors
+from contextlib import contextmanager
+from functools import lru_cache
 from threading import Thread, Lock
-from typing import Union
+from typing import Callable, Iterator, Union
 
 from bearcat.exceptions import CommandNotFound, CommandInvalid, UnexpectedResultError
 from bearcat.values import ALL_BAUD_RATES, BASE_BYTE_MAP
 
 
+# proxy addresses are IPv4 addresses with an optional port, anything else is treated as a serial port
+_PROXY_ADDRESS = re.compile(r'\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?')
+
+
+@lru_cache(maxsize=256)
+def _encode_upper(command: tuple[str, ...], encoding: str) -> bytes:
+    """Builds the uppercase bytes for a command and its arguments, cached since most polls repeat the same commands."""
+    return (','.join(command).upper() + '\r').encode(encoding)
+
+
 class Bearcat():
     """Base object that represents core functionality and implements API calls available to all Uniden Bearcat scanners."""
 
@@ -23,16 +37,21 @@ class Bearcat():
     NUM_SCAN_GROUPS = 0
     NUM_CUSTOM_SEARCH_GROUPS = 0
     TONE_MAP: dict[Union[str, float], int] = {}
+    TONE_CODE_MAP: dict[int, Union[str, float]] = {}
     AVAILABLE_KEYS: list[str] = []
+    PIPELINE_DEPTH = 8
+    RECV_SIZE = 65536
 
-    def __init__(self, port: str = '127.0.0.1', baud_rate: int = -1, timeout: float = 0.1):
+    def __init__(self, port: str = '127.0.0.1', baud_rate: int = -1, timeout: float = 0.1, low_latency: bool = True):
         """
         Args:
             port: serial port name (/dev/ttyX on Linux, COMX on Windows) or proxy address, default 127.0.0.1:65125
             baud_rate: optional serial port speed in bits per second, default 115200
             timeout: optional serial connection timeout in seconds, default 1/10 sec
+            low_latency: optional whether to request low latency mode from the serial driver where supported, default
+                         True
         """
-        if port.count('.') == 3:
+        if _PROXY_ADDRESS.fullmatch(port):
             self._serial = None
             if ':' in port:
                 parts = port.split(':')
@@ -44,6 +63,10 @@ class Bearcat():
 
             self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self._socket.connect((address, sock_port))
+            # commands are tiny and each waits on a response, so send them immediately rather than coalescing
+            self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # receive into the same buffer every time rather than allocating one per recv
+            self._recv_buffer = memoryview(bytearray(self.RECV_SIZE))
         else:
             self._socket = None
             if baud_rate < 0:
@@ -53,77 +76,221 @@ class Bearcat():
             self._serial = serial.Serial(port=port, baudrate=baud_rate, stopbits=serial.STOPBITS_ONE,
                                          bytesize=serial.EIGHTBITS, parity=serial.PARITY_NONE, xonxoff=False,
                                          rtscts=False, dsrdtr=False, timeout=timeout)
+            if low_latency:
+                self._set_low_latency()
 
         self.in_program_mode = False
         self.debug = False
         self._cmd_lock = Lock()
+        self._rx_buffer = bytearray()
+
+    def _set_low_latency(self):
+        """
+        Asks the serial driver to pass received bytes on immediately (ASYNC_LOW_LATENCY) rather than holding them for
+        its latency timer, 16 ms by default on USB serial adapters. Only available on Linux, ignored elsewhere or when
+        the driver refuses.
+        """
+        if hasattr(self._serial, 'set_low_latency_mode'):
+            try:
+                self._serial.set_low_latency_mode(True)
+            except (OSError, ValueError):
+                pass
 
     def listen(self, address: str = '127.0.0.1', port: int = 65125):
         """Creates and starts a server socket for other instances to send their bytes to."""
         s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         s.bind((address, port))
         s.listen()
         Thread(target=self._server_thread, args=(s,), daemon=True).start()
 
     def _server_thread(self, s: socket.socket):
-        """Thread that accepts all incoming connections to the server socket. Created automatically by listen()."""
+        """
+        Thread that accepts incoming connections to the server socket and serves every client connection, using a
+        single selector rather than a thread per client. Created automatically by listen().
+        """
+        sel = selectors.DefaultSelector()
+        sel.register(s, selectors.EVENT_READ)
+
+        # receive into the same buffer every time, keeping each client's partial command until the rest of it arrives
+        recv_buffer = memoryview(bytearray(self.RECV_SIZE))
+        pending: dict[socket.socket, bytes] = {}
+        # responses not yet accepted by each client's socket, sent once it is writable
+        outgoing: dict[socket.socket, bytearray] = {}
         while True:
-            client, _ = s.accept()
-            Thread(target=self._client_listener, args=(client,), daemon=True).start()
+            for key, events in sel.select():
+                if key.fileobj is s:
+                    try:
+                        client, _ = s.accept()
+                    except OSError:
+                        continue
+
+                    client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    client.setblocking(False)
+                    sel.register(client, selectors.EVENT_READ)
+                    pending[client] = bytes()
+                    outgoing[client] = bytearray()
+                    continue
+
+                client = key.fileobj
+                try:
+                    connected = not events & selectors.EVENT_READ or self._serve_client(client, recv_buffer, pending,
+                                                                                         outgoing)
+                    if connected:
+                        self._send_to_client(client, outgoing[client])
+                except (OSError, CommandNotFound, CommandInvalid, UnexpectedResultError):
+                    connected = False
+
+                if not connected:
+                    # only drop the failed client, the rest keep being served
+                    sel.unregister(client)
+                    del pending[client]
+                    del outgoing[client]
+                    client.close()
+                    continue
+
+                # stop reading from a client until it has accepted its responses
+                sel.modify(client, selectors.EVENT_WRITE if outgoing[client] else selectors.EVENT_READ)
+
+    def _serve_client(self, client: socket.socket, recv_buffer: memoryview, pending: dict[socket.socket, bytes],
+                      outgoing: dict[socket.socket, bytearray]) -> bool:
+        """
+        Executes the commands sent by a ready client connection, queueing the responses to be sent. Returns False once
+        the client disconnects.
+        """
+        try:
+            recv_len = client.recv_into(recv_buffer)
+        except BlockingIOError:
+            return True
 
-    def _client_listener(self, s: socket.socket):
-        """Thread that handles all active client connections. Create automatically by _server_thread()."""
-        while True:
-            recv_bytes = s.recv(4096)
-            if not recv_bytes:
-                break
+        if not recv_len:
+            return False
+
+        # clients may pipeline several commands in a single send, execute them back-to-back
+        *frames, pending[client] = (pending[client] + recv_buffer[:recv_len]).split(b'\r')
+        commands = [c + b'\r' for c in frames if c]
+        if commands:
+            outgoing[client] += b''.join(self._execute_commands_raw(commands, self.PIPELINE_DEPTH))
 
-            s.sendall(self._execute_command_raw(recv_bytes))
+        return True
 
-        s.close()
+    @staticmethod
+    def _send_to_client(client: socket.socket, data: bytearray):
+        """Sends as much of the given queued responses as the client's socket accepts without blocking."""
+        if data:
+            try:
+                del data[:client.send(data)]
+            except BlockingIOError:
+                pass
 
     #
     # Command Execution Helpers
     #
 
+    @classmethod
+    def _get_byte_table(cls) -> tuple:
+        """
+        Builds the replacement for every possible byte from the class's byte map, None for bytes with no known
+        replacement. Built once per class on first use and shared by all of its instances.
+        """
+        if '_byte_table' not in cls.__dict__:
+            cls._byte_table = tuple(bytes((b,)) if b < 0x80 else cls.BYTE_MAP.get(b) for b in range(256))
+
+        return cls._byte_table
+
     def _extend_ascii(self, input_bytes: bytes) -> bytes:
         """Replaces Uniden's extended ASCII characters with ASCII characters from the class's byte map."""
-        output_bytes = bytes()
-        for b in input_bytes:
-            if b < 0x80:
-                output_bytes += bytes([b])
-            else:
-                try:
-                    output_bytes += self.BYTE_MAP[b]
-                except:
-                    raise UnexpectedResultError(f'Invalid byte in response, {b}')
+        # most responses are plain ASCII and need no replacements
+        if input_bytes.isascii():
+            return input_bytes
 
-        return output_bytes
+        table = self._get_byte_table()
+        try:
+            return b''.join([table[b] for b in input_bytes])
+        except TypeError:
+            raise UnexpectedResultError(f'Invalid byte in response, {next(b for b in input_bytes if table[b] is None)}')
 
     def _execute_command_raw(self, command: bytes) -> bytes:
         """Executes a command and returns the response all in bytes."""
         with self._cmd_lock:
-            if self._serial:
-                self._serial.write(command)
-                return self._serial.readline()
-            elif self._socket:
-                self._socket.sendall(command)
-                return self._socket.recv(4096)
-            
+            self._write(command)
+            return self._read_response()
+
+    def _write(self, data: bytes):
+        """Writes bytes to the scanner. Must be called while holding the command lock."""
+        if self.debug:
+            # a pipelined write can hold several commands, print each as it goes out
+            for cmd in data.split(b'\r')[:-1]:
+                print('[SENT]\t\t', cmd.decode(self.ENCODING))
+
+        if self._serial:
+            self._serial.write(data)
+        elif self._socket:
+            self._socket.sendall(data)
+
+    def _recv(self) -> Union[bytes, memoryview]:
+        """
+        Receives whatever bytes are available from the scanner, waiting for at least one. Returns no bytes on timeout or
+        disconnect. Must be called while holding the command lock.
+        """
+        if self._serial:
+            return self._serial.read(self._serial.in_waiting or 1)
+        elif self._socket:
+            recv_len = self._socket.recv_into(self._recv_buffer)
+            return self._recv_buffer[:recv_len]
+
         return bytes()
 
-    def execute_command(self, *command: str) -> list[str]:
-        """Executes a command and returns the response."""
-        # build and send command
+    def _read_response(self) -> bytes:
+        """Reads a single carriage return terminated response. Must be called while holding the command lock."""
+        # responses can arrive split across or sharing reads, keep any bytes past the first response for later
+        end = self._rx_buffer.find(b'\r')
+        while end < 0:
+            recv_bytes = self._recv()
+            if not recv_bytes:
+                break
+
+            searched = len(self._rx_buffer)
+            self._rx_buffer += recv_bytes
+            end = self._rx_buffer.find(b'\r', searched)
+
+        # if the read timed out or the connection closed mid-response, return whatever arrived
+        if end < 0:
+            end = len(self._rx_buffer) - 1
+
+        response = bytes(self._rx_buffer[:end + 1])
+        del self._rx_buffer[:end + 1]
+        return response
+
+    def _execute_commands_raw(self, commands: list[bytes], window: int = 0) -> list[bytes]:
+        """
+        Executes a sequence of commands and returns each response all in bytes. Up to window commands are written
+        before waiting on their responses, with another command written as each response arrives.
+        """
+        if not window:
+            window = len(commands)
+
+        responses: list[bytes] = []
+        with self._cmd_lock:
+            self._write(b''.join(commands[:window]))
+            for i in range(len(commands)):
+                responses.append(self._read_response())
+                if i + window < len(commands):
+                    self._write(commands[i + window])
+
+        return responses
+
+    def _encode_command(self, *command: str) -> bytes:
+        """Builds the bytes sent to the scanner for a given command and its arguments."""
         if command[0].upper() == 'CIN':
+            # channel names are case sensitive and rarely repeat, so they skip the cache
             cmd_str = ','.join([c.upper() if i != 2 else c for i, c in enumerate(command)]) + '\r'
-        else:
-            cmd_str = ','.join(command).upper() + '\r'
-        cmd_bytes = cmd_str.encode(self.ENCODING)
-        res_bytes = self._execute_command_raw(cmd_bytes)
-        if self.debug:
-            print('[SENT]\t\t', cmd_str)
+            return cmd_str.encode(self.ENCODING)
 
+        return _encode_upper(command, self.ENCODING)
+
+    def _decode_response(self, command: str, res_bytes: bytes) -> list[str]:
+        """Parses the response to a given command, raising an exception if the command was not successful."""
         # decode command string and parse as comma separated string
         res_str = self._extend_ascii(res_bytes).decode('UTF-8').strip()
         res_parts = res_str.split(',')
@@ -133,7 +300,7 @@ class Bearcat():
         # determine if the command successfully ran
         if res_parts[0] == 'ERR':
             raise CommandNotFound('Scanner did not recognize command')
-        elif res_parts[0] != command[0]:
+        elif res_parts[0] != command:
             raise UnexpectedResultError(f'Unrecognized command response, {res_parts[0]}')
         elif len(res_parts) == 1:
             raise UnexpectedResultError('No value returned')
@@ -143,6 +310,66 @@ class Bearcat():
         # skip command and return result
         return res_parts[1:]
 
+    def execute_command(self, *command: str) -> list[str]:
+        """Executes a command and returns the response."""
+        cmd_bytes = self._encode_command(*command)
+        res_bytes = self._execute_command_raw(cmd_bytes)
+        return self._decode_response(command[0], res_bytes)
+
+    @contextmanager
+    def sent_command(self, *command: str) -> Iterator[Callable[[], list[str]]]:
+        """
+        Context manager which writes a given command then holds the scanner until the block exits, yielding a function
+        which waits for and returns the response. Lets the round-trips to several scanners overlap by sending to each
+        of them before reading any response, see tools.get_reception_statuses(). An unread response is discarded on
+        exit.
+        """
+        read = False
+
+        def read_response() -> list[str]:
+            nonlocal read
+            read = True
+            return self._decode_response(command[0], self._read_response())
+
+        with self._cmd_lock:
+            self._write(self._encode_command(*command))
+            try:
+                yield read_response
+            finally:
+                if not read:
+                    self._read_response()
+
+    def pipeline(self, *commands: Union[str, tuple[str, ...], bytes], return_exceptions: bool = False) -> list:
+        """
+        Executes several commands without waiting on a full round-trip per command, for latency bound workloads like
+        polling. At most PIPELINE_DEPTH commands are outstanding at once to avoid overflowing the scanner's input
+        buffer.
+
+        Args:
+            commands: each command either as a string, a tuple of the command and its arguments, or already encoded
+                bytes
+            return_exceptions: optionally return the exception raised by a failed command in place of its response,
+                rather than raising it, default False
+
+        Returns:
+            the response to each command, in order
+        """
+        cmd_bytes = [c if isinstance(c, bytes) else self._encode_command(*(c if isinstance(c, tuple) else (c,)))
+                     for c in commands]
+        res_bytes = self._execute_commands_raw(cmd_bytes, self.PIPELINE_DEPTH)
+
+        responses = []
+        for c, r in zip(cmd_bytes, res_bytes):
+            try:
+                responses.append(self._decode_response(c.rstrip(b'\r').split(b',', 1)[0].decode(self.ENCODING), r))
+            except (CommandNotFound, CommandInvalid, UnexpectedResultError) as e:
+                if not return_exceptions:
+                    raise
+
+                responses.append(e)
+
+        return responses
+
     @staticmethod
     def check_response(response: list[str], expected_values: int):
         """Used for to check that the correct number of values were returned. Raises an UnexpectedResultError is not."""
@@ -152,8 +379,9 @@ class Bearcat():
     @staticmethod
     def check_ok(response: list[str]):
         """Used for basic commands to check that OK was returned. Raises an UnexpectedResultError is not OK."""
-        Bearcat.check_response(response, 1)
-        if response[0] != 'OK':
+        if response != ['OK']:
+            # only check the number of values once the fast comparison fails, to pick the right error
+            Bearcat.check_response(response, 1)
             raise UnexpectedResultError(f'Not OK response, "{response[0]}"')
 
     def execute_action(self, cmd: str):
@@ -177,16 +405,13 @@ class Bearcat():
 
     def execute_program_mode_command(self, *command: str) -> list[str]:
         """Executes a command and returns the response for commands that require program mode."""
-        already_program = self.in_program_mode
-        if not already_program:
-            self.enter_program_mode()
+        with self.program_mode():
+            return self.execute_command(*command)
 
-        response = self.execute_command(*command)
-
-        if not already_program:
-            self.exit_program_mode()
-
-        return response
+    def program_mode_pipeline(self, *commands: Union[str, tuple[str, ...], bytes]) -> list[list[str]]:
+        """Pipelines several commands, see pipeline(), for commands that require program mode."""
+        with self.program_mode():
+            return self.pipeline(*commands)
 
     def get_program_mode_string(self, cmd: str) -> str:
         """Sends a given command expecting a single value in return, for commands that require program mode."""
@@ -199,9 +424,21 @@ class Bearcat():
         response = self.get_program_mode_string(cmd)
         return int(response)
 
+    @staticmethod
+    def parse_flag_string(flags: str) -> list[bool]:
+        """Parses a string of flags, where 1 means the flag is set, into a list of booleans."""
+        if flags.strip('01'):
+            raise UnexpectedResultError(f'Unexpected flags {flags}, expected only 0 and 1')
+
+        return [c == '1' for c in flags]
+
     @staticmethod
     def parse_program_mode_group(states: str) -> list[bool]:
-        return [not bool(int(c)) for c in states]
+        """Parses a string of group states, where 0 means the group is enabled, into a list of booleans."""
+        if states.strip('01'):
+            raise UnexpectedResultError(f'Unexpected group states {states}, expected only 0 and 1')
+
+        return [c == '0' for c in states]
 
     def get_program_mode_group(self, cmd: str, total_groups: int) -> list[bool]:
         """
@@ -220,7 +457,8 @@ class Bearcat():
 
     @staticmethod
     def build_program_mode_group(states: list[bool]) -> str:
-        return ''.join([str(int(not b)) for b in states])
+        """Builds a string of group states from a list of booleans, see parse_program_mode_group()."""
+        return ''.join(['0' if b else '1' for b in states])
 
     def set_program_mode_group(self, cmd: str, states: list[bool], total_groups: int):
         """Sends a given command and string representing a list of booleans, for commands that require program mode."""
@@ -241,6 +479,23 @@ class Bearcat():
         self.execute_action('EPG')
         self.in_program_mode = False
 
+    @contextmanager
+    def program_mode(self) -> Iterator[None]:
+        """
+        Context manager which holds the scanner in program mode for the duration of the block, so that a series of
+        program mode commands only enter (PRG) and exit (EPG) program mode once. Does nothing if the scanner is already
+        in program mode.
+        """
+        if self.in_program_mode:
+            yield
+            return
+
+        self.enter_program_mode()
+        try:
+            yield
+        finally:
+            self.exit_program_mode()
+
     #
     # Getters
     #
@@ -270,19 +525,13 @@ class Bearcat():
         Returns:
             a list of all globally locked out frequencies in Hz
         """
-        program_mode = self.in_program_mode
-
         freqs: list[int] = []
-        if not program_mode:
-            self.enter_program_mode()
-
-        latest = self.get_program_mode_number('GLF')
-        while latest != -1:
-            freqs.append(latest * self.FREQUENCY_SCALE)
+        with self.program_mode():
             latest = self.get_program_mode_number('GLF')
+            while latest != -1:
+                freqs.append(latest * self.FREQUENCY_SCALE)
+                latest = self.get_program_mode_number('GLF')
 
-        if not program_mode:
-            self.exit_program_mode()
         return freqs
 
     #
@@ -340,6 +589,22 @@ class Bearcat():
             f'Unexpected frequency {frequency}, expected 25 - 512 MHz'
         self.set_program_mode_value('LOF', frequency // self.FREQUENCY_SCALE)
 
+    def lock_out_frequencies(self, frequencies: list[int]):
+        """
+        Pipelines lock out frequency (LOF) commands for several frequencies, see lock_out_frequency(). Requires program
+        mode, which is entered and exited once for all the frequencies.
+
+        Args:
+            frequencies: frequencies in Hz to lockout
+        """
+        for frequency in frequencies:
+            assert self.MIN_FREQUENCY_HZ <= frequency <= self.MAX_FREQUENCY_HZ,\
+                f'Unexpected frequency {frequency}, expected 25 - 512 MHz'
+
+        commands = [('LOF', str(f // self.FREQUENCY_SCALE)) for f in frequencies]
+        for response in self.program_mode_pipeline(*commands):
+            self.check_ok(response)
+
     def set_custom_search_group(self, states: list[bool]):
         """
         Sends the set custom search group (CSG) command. Requires program mode.
@@ -1,6 +1,13 @@
 """Contains classes commonly used between scanner models."""
+import re
 from enum import Enum
 
+from bearcat.exceptions import UnexpectedResultError
+
+
+# runs of inverted characters in a line's formatting string
+_INVERTED_RUN = re.compile(r'\*+')
+
 
 class Screen:
     """Representation of the scanner's screen, composed of a list of lines."""
@@ -15,29 +22,29 @@ class Screen:
 
         def __str__(self) -> str:
             """Apply formatting on the line's string."""
-            text = self.text
+            if '*' not in self.formatting:
+                return self.text
 
-            # underline characters instead of inverting the colors
-            underline = False
-            for i, c in enumerate(self.formatting):
-                if c == '*' and not underline:
-                    text = text[:i] + '\033[4m' + text[i:]
-                    underline = True
-                elif c != '*' and underline:
-                    text = text[:i+1] + '\033[0m' + text[i+1:]
-                    underline = False
+            # underline characters instead of inverting the colors, collecting the pieces to join once
+            parts = []
+            cursor = 0
+            for run in _INVERTED_RUN.finditer(self.formatting, 0, len(self.text)):
+                parts += [self.text[cursor:run.start()], '\033[4m', self.text[run.start():run.end()], '\033[0m']
+                cursor = run.end()
 
-            if underline:
-                text += '\033[0m'
-
-            return text
+            parts.append(self.text[cursor:])
+            return ''.join(parts)
 
     def __init__(self, *args: str):
         """
         Constructor, designed to directly take the response to the STS command. Uses the first argument to determine the
         number of lines to produce, then the following pairs are each line and its formatting.
         """
-        self.lines = [Screen.Line(args[1 + i * 2], args[2 + i * 2], bool(int(c))) for i, c in enumerate(args[0])]
+        if args[0].strip('01'):
+            raise UnexpectedResultError(f'Unexpected line sizes {args[0]}, expected only 0 and 1')
+
+        self.lines = [Screen.Line(text, formatting, size == '1')
+                      for size, text, formatting in zip(args[0], args[1::2], args[2::2])]
 
     def __str__(self) -> str:
         """Join each line's string as a new line."""
@@ -54,6 +61,7 @@ class Modulation(Enum):
 
 class RadioState:
     """Object representation of radio state returned by both GLG and CIN commands."""
+    __slots__ = ('index', 'name', 'frequency', 'modulation', 'tone_code')
 
     def __init__(self, index: int = -1, name: str = '', frequency: int = 0, modulation: Modulation = Modulation.NFM, tone_code: int = 0):
         """
@@ -76,6 +84,7 @@ class RadioState:
 
 class Channel(RadioState):
     """Object representation of radio state used with CIN command."""
+    __slots__ = ('delay', 'lockout', 'priority')
 
     def __init__(self, index: int = -1, name: str = '', frequency: int = 0, modulation: Modulation = Modulation.NFM, tone_code: int = 0,
                  delay: str = '2', lockout: bool = True, priority: bool = False):
@@ -91,7 +100,6 @@ class Channel(RadioState):
             priority: optional channel priority (one per bank), default False
         """
         super().__init__(index, name, frequency, modulation, tone_code)
-        self.index = index
         self.delay = delay
         self.lockout = lockout
         self.priority = priority
@@ -1,10 +1,11 @@
 """Defines functions used exclusively by the Uniden BC125AT scanner."""
 from enum import Enum
+from typing import Union
 
 from bearcat import Bearcat
 from bearcat.classes import Modulation, Screen, RadioState, Channel
 from bearcat.scanners import common, handheld
-from bearcat.values import BASE_BYTE_MAP, BASE_TONE_MAP, HANDHELD_KEYS
+from bearcat.values import BASE_BYTE_MAP, BASE_TONE_CODE_MAP, BASE_TONE_MAP, HANDHELD_KEYS
 
 
 class BC125AT_BacklightMode(Enum):
@@ -64,6 +65,7 @@ class BC125AT(Bearcat):
     NUM_SERVICE_SEARCH_GROUPS = 10
     NUM_FREQUENCY_BANDS = 5
     TONE_MAP = BASE_TONE_MAP
+    TONE_CODE_MAP = BASE_TONE_CODE_MAP
     AVAILABLE_KEYS = HANDHELD_KEYS
     BYTE_MAP = BASE_BYTE_MAP
 
@@ -93,6 +95,8 @@ class BC125AT(Bearcat):
     get_custom_search_settings = handheld.get_custom_search_settings
     get_priority_mode = handheld.get_priority_mode
     get_scan_channel_group = handheld.get_scan_channel_group
+    iter_channel_infos = handheld.iter_channel_infos
+    get_channel_infos = handheld.get_channel_infos
     set_band_plan = handheld.set_band_plan
     set_custom_search_settings = handheld.set_custom_search_settings
     set_priority_mode = handheld.set_priority_mode
@@ -101,6 +105,7 @@ class BC125AT(Bearcat):
     enter_test_mode = handheld.enter_test_mode
     scan_groups = handheld.scan_groups
     frequency = handheld.frequency
+    get_status_and_reception = handheld.get_status_and_reception
     print_screen = handheld.print_screen
 
     #
@@ -116,7 +121,11 @@ class BC125AT(Bearcat):
             whether the scanner is squelched
             whether the scanner is muted.
         """
-        response = self.execute_command('STS')
+        return self.parse_status(self.execute_command('STS'))
+
+    @staticmethod
+    def parse_status(response: list[str]) -> tuple[Screen, bool, bool]:
+        """Parses the response to the get status (STS) command, see get_status()."""
         return Screen(*response[:-9]), bool(int(response[-9])), bool(int(response[-8]))
 
     def get_reception_status(self) -> tuple[RadioState, bool, bool]:
@@ -128,7 +137,10 @@ class BC125AT(Bearcat):
             whether the scanner is squelched
             whether the scanner is muted.
         """
-        response = self.execute_command('GLG')
+        return self.parse_reception_status(self.execute_command('GLG'))
+
+    def parse_reception_status(self, response: list[str]) -> tuple[RadioState, bool, bool]:
+        """Parses the response to the get reception status (GLG) command, see get_reception_status()."""
         self.check_response(response, 12)
         freq = int(response[10]) if response[10] else 0
         state = RadioState(freq, response[6], int(response[0]) * self.FREQUENCY_SCALE,
@@ -194,7 +206,10 @@ class BC125AT(Bearcat):
             object representation of the channel configuration
         """
         assert 1 <= channel <= self.TOTAL_CHANNELS
-        response = self.execute_program_mode_command('CIN', str(channel))
+        return self.parse_channel_info(self.execute_program_mode_command('CIN', str(channel)))
+
+    def parse_channel_info(self, response: list[str]) -> Channel:
+        """Parses the response to the get channel info (CIN) command, see get_channel_info()."""
         self.check_response(response, 8)
         return Channel(int(response[0]), response[1], int(response[2]) * self.FREQUENCY_SCALE,
                     Modulation(response[3]), int(response[4]), delay=response[5],
@@ -226,7 +241,7 @@ class BC125AT(Bearcat):
         response = self.execute_program_mode_command('CLC')
         self.check_response(response, 5)
         return BC125AT_CloseCallMode(response[0]), bool(int(response[1])), bool(int(response[2])),\
-            [bool(int(c)) for c in response[3]], bool(int(response[4]))
+            self.parse_flag_string(response[3]), bool(int(response[4]))
 
     def get_service_search_group(self):
         """
@@ -293,6 +308,12 @@ class BC125AT(Bearcat):
         """
         self.check_ok(self.execute_program_mode_command('KBP', str(int(not enabled) * 99), str(int(lock))))
 
+    def _channel_info_command(self, channel: Channel) -> tuple[str, ...]:
+        """Builds the set channel info (CIN) command for a given channel."""
+        freq = int(channel.frequency) // self.FREQUENCY_SCALE
+        return ('CIN', str(channel.index), channel.name, str(freq), channel.modulation.value, str(channel.tone_code),
+                channel.delay, str(int(channel.lockout)), str(int(channel.priority)))
+
     def set_channel_info(self, channel: Channel):
         """
         Sends the set channel info (CIN) command. Requires program mode.
@@ -300,10 +321,35 @@ class BC125AT(Bearcat):
         Args:
             channel: object representation of the desired channel parameters
         """
-        freq = int(channel.frequency / self.FREQUENCY_SCALE)
-        self.check_ok(self.execute_program_mode_command('CIN', str(channel.index), channel.name, str(freq),
-                    channel.modulation.value, str(channel.tone_code), channel.delay, str(int(channel.lockout)),
-                    str(int(channel.priority))))
+        self.check_ok(self.execute_program_mode_command(*self._channel_info_command(channel)))
+
+    def encode_channel(self, channel: Channel) -> bytes:
+        """
+        Encodes the command used by bulk_set_channels() to apply a given channel, so it can be built ahead of time.
+
+        Args:
+            channel: object representation of the desired channel parameters
+
+        Returns:
+            the command bytes, set channel info (CIN) if the channel has a frequency otherwise its delete form
+        """
+        if channel.frequency:
+            return self._encode_command(*self._channel_info_command(channel))
+
+        return self._encode_command('DCH', str(channel.index))
+
+    def bulk_set_channels(self, channels: list[Union[Channel, bytes]]):
+        """
+        Pipelines set channel info (CIN) commands for many channels at once. Channels without a frequency are instead
+        deleted using the delete channel (DCH) command. Requires program mode.
+
+        Args:
+            channels: object representations of the desired channel parameters, or their commands from
+                encode_channel()
+        """
+        commands = [c if isinstance(c, bytes) else self.encode_channel(c) for c in channels]
+        for response in self.program_mode_pipeline(*commands):
+            self.check_ok(response)
 
     def set_search_close_call_settings(self, delay: BC125AT_DelayTime, code_search: bool):
         """
@@ -328,7 +374,7 @@ class BC125AT(Bearcat):
             lockout: whether scan should be unlocked
         """
         assert len(bands) == self.NUM_FREQUENCY_BANDS, f'Unexpected bands length of {len(bands)}, expected {self.NUM_FREQUENCY_BANDS}'
-        band_str = ''.join([str(int(b)) for b in bands])
+        band_str = ''.join(['1' if b else '0' for b in bands])
         self.check_ok(self.execute_program_mode_command('CLC', mode.value, str(int(beep)), str(int(light)),
                                                             band_str, str(int(lockout))))
 
@@ -364,10 +410,31 @@ class BC125AT(Bearcat):
         if not compare_channels(self.get_channel_info(channel.index), channel):
             self.set_channel_info(channel)
 
-    def clear_channel(self, index: int):
-        """Deletes a given channel if it currently has a name and frequency."""
-        channel = self.get_channel_info(index)
-        if channel.name or channel.frequency:
+    def update_channels(self, channels: list[Channel]):
+        """
+        Sets the info of each given channel only if the info has changed, see update_channel(). Reads the current info
+        and writes the changed channels in bulk, inside a single program mode session.
+        """
+        with self.program_mode():
+            current = self.get_channel_infos([c.index for c in channels])
+            changed = [c for c, existing in zip(channels, current) if not compare_channels(existing, c)]
+            if changed:
+                self.bulk_set_channels(changed)
+
+    def clear_channel(self, index: int, force: bool = False):
+        """
+        Deletes a given channel if it currently has a name and frequency.
+
+        Args:
+            index: channel number to clear
+            force: optionally delete the channel without first reading it, saving a round-trip, default False
+        """
+        with self.program_mode():
+            if not force:
+                channel = self.get_channel_info(index)
+                if not (channel.name or channel.frequency):
+                    return
+
             common.delete_channel(self, index)
 
 
@@ -1,5 +1,6 @@
 """Defines functions used exclusively by the Uniden BC75XLT scanner."""
 from enum import Enum
+from typing import Union
 
 from bearcat import Bearcat
 from bearcat.exceptions import UnexpectedResultError
@@ -33,12 +34,17 @@ def compare_channels(a: Channel, b: Channel) -> bool:
 
 
 def determine_modulation(frequency_hz: int):
-    if frequency_hz < 28e6 or 108 <= frequency_hz < 137:
+    if frequency_hz < 28e6 or 108e6 <= frequency_hz < 137e6:
         return Modulation.AM
     else:
         return Modulation.NFM
 
 
+def blank_channel(index: int) -> Channel:
+    """Builds the channel used to represent an empty channel, since the BC75XLT has no delete command."""
+    return Channel(index, '', 0, determine_modulation(0), 0, BC75XLT_DelayTime.ZERO.value, True, False)
+
+
 class BC75XLT(Bearcat):
     """Uniden Bearcat BC75XLT, a 300 channel analog scanner."""
     MODEL = 'BC75XLT'
@@ -54,6 +60,7 @@ class BC75XLT(Bearcat):
     NUM_SERVICE_SEARCH_GROUPS = 0
     NUM_FREQUENCY_BANDS = 4
     TONE_MAP = {}
+    TONE_CODE_MAP = {}
     AVAILABLE_KEYS = HANDHELD_KEYS
     BYTE_MAP = BASE_BYTE_MAP
 
@@ -80,6 +87,8 @@ class BC75XLT(Bearcat):
     get_custom_search_settings = handheld.get_custom_search_settings
     get_priority_mode = handheld.get_priority_mode
     get_scan_channel_group = handheld.get_scan_channel_group
+    iter_channel_infos = handheld.iter_channel_infos
+    get_channel_infos = handheld.get_channel_infos
     set_band_plan = handheld.set_band_plan
     set_custom_search_settings = handheld.set_custom_search_settings
     set_priority_mode = handheld.set_priority_mode
@@ -88,6 +97,7 @@ class BC75XLT(Bearcat):
     enter_test_mode = handheld.enter_test_mode
     scan_groups = handheld.scan_groups
     frequency = handheld.frequency
+    get_status_and_reception = handheld.get_status_and_reception
     print_screen = handheld.print_screen
 
     #
@@ -116,7 +126,11 @@ class BC75XLT(Bearcat):
             whether the scanner is squelched
             whether the scanner is muted.
         """
-        response = self.execute_command('STS')
+        return self.parse_status(self.execute_command('STS'))
+
+    @staticmethod
+    def parse_status(response: list[str]) -> tuple[Screen, bool, bool]:
+        """Parses the response to the get status (STS) command, see get_status()."""
         return Screen(*response[:-2]), bool(int(response[-2])), bool(int(response[-1]))
 
     def get_reception_status(self) -> tuple[RadioState, bool, bool]:
@@ -128,10 +142,13 @@ class BC75XLT(Bearcat):
             whether the scanner is squelched
             whether the scanner is muted.
         """
-        response = self.execute_command('GLG')
+        return self.parse_reception_status(self.execute_command('GLG'))
+
+    def parse_reception_status(self, response: list[str]) -> tuple[RadioState, bool, bool]:
+        """Parses the response to the get reception status (GLG) command, see get_reception_status()."""
         self.check_response(response, 12)
         freq = float(response[0]) if response[0] else 0
-        state = RadioState(-1, '', int(freq * 1e6), Modulation(response[1]))
+        state = RadioState(-1, '', round(freq * 1e6), Modulation(response[1]))
         return state, bool(int(response[7])), bool(int(response[8]))
 
     #
@@ -162,7 +179,10 @@ class BC75XLT(Bearcat):
         """
         # BC75XLT skips modulation and tone code
         assert 1 <= channel <= self.TOTAL_CHANNELS
-        response = self.execute_program_mode_command('CIN', str(channel))
+        return self.parse_channel_info(self.execute_program_mode_command('CIN', str(channel)))
+
+    def parse_channel_info(self, response: list[str]) -> Channel:
+        """Parses the response to the get channel info (CIN) command, see get_channel_info()."""
         self.check_response(response, 8)
         frequency_hz = int(response[2]) * self.FREQUENCY_SCALE
         return Channel(int(response[0]), response[1], frequency_hz, determine_modulation(frequency_hz), 0,
@@ -221,7 +241,7 @@ class BC75XLT(Bearcat):
         # BC75XLT missing lockout
         response = self.execute_program_mode_command('CLC')
         self.check_response(response, 5)
-        bands = [not b for b in self.parse_program_mode_group(response[3])]
+        bands = self.parse_flag_string(response[3])
         del bands[3]
         return BC75XLT_CloseCallMode(response[0]), bool(int(response[1])), bool(int(response[2])), bands
             
@@ -239,6 +259,11 @@ class BC75XLT(Bearcat):
         """
         self.check_ok(self.execute_program_mode_command('KBP', '', str(int(lock))))
 
+    def _channel_info_command(self, channel: Channel) -> tuple[str, ...]:
+        """Builds the set channel info (CIN) command for a given channel."""
+        return ('CIN', str(channel.index), '', str(int(channel.frequency) // self.FREQUENCY_SCALE), '', '',
+                channel.delay, str(int(channel.lockout)), str(int(channel.priority)))
+
     def set_channel_info(self, channel: Channel):
         """
         Sends the set channel info (CIN) command. Requires program mode.
@@ -246,10 +271,35 @@ class BC75XLT(Bearcat):
         Args:
             channel: object representation of the desired channel parameters
         """
-        self.check_ok(self.execute_program_mode_command('CIN', str(channel.index), '',
-                                                        str(int(channel.frequency / self.FREQUENCY_SCALE)), '', '',
-                                                        channel.delay, str(int(channel.lockout)),
-                                                        str(int(channel.priority))))
+        self.check_ok(self.execute_program_mode_command(*self._channel_info_command(channel)))
+
+    def encode_channel(self, channel: Channel) -> bytes:
+        """
+        Encodes the command used by bulk_set_channels() to apply a given channel, so it can be built ahead of time.
+
+        Args:
+            channel: object representation of the desired channel parameters
+
+        Returns:
+            the command bytes, set channel info (CIN) if the channel has a frequency otherwise its delete form
+        """
+        if channel.frequency:
+            return self._encode_command(*self._channel_info_command(channel))
+
+        return self._encode_command(*self._channel_info_command(blank_channel(channel.index)))
+
+    def bulk_set_channels(self, channels: list[Union[Channel, bytes]]):
+        """
+        Pipelines set channel info (CIN) commands for many channels at once. Channels without a frequency are instead
+        cleared, see clear_channel(). Requires program mode.
+
+        Args:
+            channels: object representations of the desired channel parameters, or their commands from
+                encode_channel()
+        """
+        commands = [c if isinstance(c, bytes) else self.encode_channel(c) for c in channels]
+        for response in self.program_mode_pipeline(*commands):
+            self.check_ok(response)
 
     def set_xlt_custom_search_group(self, states: list[bool], delay: BC75XLT_DelayTime, direction_down: bool):
         """
@@ -298,7 +348,7 @@ class BC75XLT(Bearcat):
                 (25 - 54, 108 - 137, 137 - 174, 406 - 512 MHz)
         """
         assert len(bands) == self.NUM_FREQUENCY_BANDS, f'Unexpected bands length of {len(bands)}, expected {self.NUM_FREQUENCY_BANDS}'
-        band_str = ''.join([str(int(b)) for b in bands])
+        band_str = ''.join(['1' if b else '0' for b in bands])
         band_str = band_str[:3] + '0' + band_str[3]  # 4th value is a reserved 0
         self.check_ok(self.execute_program_mode_command('CLC', mode.value, str(int(beep)), str(int(light)), band_str, ''))
 
@@ -334,9 +384,25 @@ class BC75XLT(Bearcat):
         if not compare_channels(self.get_channel_info(channel.index), channel):
             self.set_channel_info(channel)
 
-    def clear_channel(self, index: int):
-        """Deletes a given channel if it currently has a frequency."""
-        channel = self.get_channel_info(index)
-        if channel.frequency:
-            modulation = determine_modulation(channel.frequency)
-            self.set_channel_info(Channel(channel.index, '', 0, modulation, 0, BC75XLT_DelayTime.ZERO.value, True, False))
+    def update_channels(self, channels: list[Channel]):
+        """
+        Sets the info of each given channel only if the info has changed, see update_channel(). Reads the current info
+        and writes the changed channels in bulk, inside a single program mode session.
+        """
+        with self.program_mode():
+            current = self.get_channel_infos([c.index for c in channels])
+            changed = [c for c, existing in zip(channels, current) if not compare_channels(existing, c)]
+            if changed:
+                self.bulk_set_channels(changed)
+
+    def clear_channel(self, index: int, force: bool = False):
+        """
+        Deletes a given channel if it currently has a frequency.
+
+        Args:
+            index: channel number to clear
+            force: optionally delete the channel without first reading it, saving a round-trip, default False
+        """
+        with self.program_mode():
+            if force or self.get_channel_info(index).frequency:
+                self.set_channel_info(blank_channel(index))
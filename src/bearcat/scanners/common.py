@@ -118,13 +118,17 @@ def press_key(self: Bearcat, key: str):
 
 def press_key_sequence(self: Bearcat, keys: str):
     """
-    Simulates a sequence of key presses.
+    Simulates a sequence of key presses. All keys are checked before any are pressed, then the presses are pipelined.
 
     Args:
         keys: desired keys to press in sequence
     """
-    for k in keys:
-        press_key(self, k)
+    keys = keys.upper()
+    for key in keys:
+        assert key in self.AVAILABLE_KEYS, f'Unrecognized key, {key}'
+
+    for response in self.pipeline(*[('KEY', key, KeyAction.PRESS.value) for key in keys]):
+        self.check_ok(response)
 
 
 def long_press_key(self: Bearcat, key: str):
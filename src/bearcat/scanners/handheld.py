@@ -1,8 +1,9 @@
 """Defines functions that are applicable to most if not all known handheld Uniden scanners."""
 from enum import Enum
+from typing import Iterator, Optional
 
 from bearcat import Bearcat
-from bearcat.classes import Screen
+from bearcat.classes import Channel, RadioState, Screen
 from bearcat.exceptions import UnexpectedResultError
 
 
@@ -61,7 +62,7 @@ def memory_read(self: Bearcat, location: int) -> tuple[list[int], int]:
     response = self.execute_command('MRD', str(location))
     self.check_response(response, 18)
     assert int(response[0], 16) == location
-    return [int(b, 16) for b in response[1:17]], int(response[17], 16)
+    return list(bytes.fromhex(''.join(response[1:17]))), int(response[17], 16)
 
 #
 # Setters
@@ -119,6 +120,46 @@ def get_scan_channel_group(self: Bearcat) -> list[bool]:
     """
     return self.get_program_mode_group('SCG', self.NUM_SCAN_GROUPS)
 
+
+def iter_channel_infos(self: Bearcat, start: int = 1, end: Optional[int] = None) -> Iterator[Channel]:
+    """
+    Pipelines get channel info (CIN) commands for a range of channels, one bank at a time. Requires program mode.
+
+    Args:
+        start: the first channel number to read, default 1
+        end: the last channel number to read, default the last channel
+
+    Yields:
+        object representation of each channel configuration, in order
+    """
+    end = end or self.TOTAL_CHANNELS
+    assert 1 <= start <= end <= self.TOTAL_CHANNELS
+
+    # stay in program mode between banks rather than re-entering it for each one
+    with self.program_mode():
+        bank_size = self.TOTAL_CHANNELS // 10
+        for bank_start in range(start, end + 1, bank_size):
+            channels = range(bank_start, min(bank_start + bank_size, end + 1))
+            for response in self.pipeline(*[('CIN', str(i)) for i in channels]):
+                yield self.parse_channel_info(response)
+
+
+def get_channel_infos(self: Bearcat, channels: list[int]) -> list[Channel]:
+    """
+    Pipelines get channel info (CIN) commands for any given channels, entering program mode once for all of them.
+    Requires program mode. See iter_channel_infos() for reading a whole range of channels.
+
+    Args:
+        channels: channel numbers to read
+
+    Returns:
+        object representation of each requested channel configuration, in the order requested
+    """
+    for channel in channels:
+        assert 1 <= channel <= self.TOTAL_CHANNELS, f'Unexpected channel {channel}, expected 1 - {self.TOTAL_CHANNELS}'
+
+    return [self.parse_channel_info(r) for r in self.program_mode_pipeline(*[('CIN', str(i)) for i in channels])]
+
 #
 # Program Mode Setters
 #
@@ -175,7 +216,7 @@ def go_to_quick_search_hold_mode(self: Bearcat, frequency: int, delay: str = '')
 
     assert self.MIN_FREQUENCY_HZ <= frequency <= self.MAX_FREQUENCY_HZ,\
         f'Unexpected frequency {frequency}, expected {self.MIN_FREQUENCY_HZ} - {self.MAX_FREQUENCY_HZ}'
-    self.check_ok(self.execute_command('QSH', str(int(frequency / self.FREQUENCY_SCALE)), '', '', '', '',
+    self.check_ok(self.execute_command('QSH', str(int(frequency) // self.FREQUENCY_SCALE), '', '', '', '',
                                          delay, '', '', '', '', '', '', ''))
 
 
@@ -212,7 +253,7 @@ def scan_groups(self: Bearcat, *groups: int):
 
 def frequency(self: Bearcat, frequency_mhz: float):
     """Shortcut to jump to a given frequency."""
-    go_to_quick_search_hold_mode(self, frequency=int(frequency_mhz * 1e6))
+    go_to_quick_search_hold_mode(self, frequency=round(frequency_mhz * 1e6))
 
 
 def get_status(self: Bearcat) -> tuple[Screen, bool, bool]:
@@ -221,6 +262,18 @@ def get_status(self: Bearcat) -> tuple[Screen, bool, bool]:
     return Screen(), False, False
 
 
+def get_status_and_reception(self: Bearcat) -> tuple[tuple[Screen, bool, bool], tuple[RadioState, bool, bool]]:
+    """
+    Pipelines the get status (STS) and get reception status (GLG) commands so both are fetched in one round-trip.
+
+    Returns:
+        the status, see get_status()
+        the reception status, see get_reception_status()
+    """
+    status, reception = self.pipeline('STS', 'GLG')
+    return self.parse_status(status), self.parse_reception_status(reception)
+
+
 def print_screen(self: Bearcat):
     """Fetches and prints the current screen state."""
     screen, _, _ = get_status(self)
@@ -1,5 +1,7 @@
 from time import sleep
-from typing import Callable
+from typing import Callable, TypeVar
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
 from threading import Thread
 from serial import SerialException
 from serial.tools.list_ports import comports
@@ -9,8 +11,10 @@ from bearcat.classes import RadioState
 from bearcat.exceptions import CommandNotFound, ScannerNotFound, UnexpectedResultError, UnsupportedModel
 from bearcat.values import ALL_BAUD_RATES
 
+T = TypeVar('T')
 
-def _monitor_thread(scanner: Bearcat, callback: Callable[[RadioState, bool], bool]):
+
+def _monitor_thread(scanner: Bearcat, callback: Callable[[RadioState, bool], bool], interval: float):
     """Thread which monitors the given scanner and triggers the given callback on squelch."""
     running = True
     receiving = RadioState()
@@ -27,18 +31,57 @@ def _monitor_thread(scanner: Bearcat, callback: Callable[[RadioState, bool], boo
             if not squelched:
                 receiving = None
 
-        sleep(0.001)
+        sleep(interval)
 
 
-def on_squelch(scanner: Bearcat, callback: Callable[[RadioState, bool], bool]):
+def on_squelch(scanner: Bearcat, callback: Callable[[RadioState, bool], bool], interval: float = 0.02):
     """
     Starts a thread which monitors the given scanner and triggers the given callback on squelch.
 
     Args:
         scanner: scanner to monitor for squelch
         callback: function to call when a squelch occurs or ends
+        interval: optional time between polls of the scanner in seconds, default 20 ms
+    """
+    Thread(target=_monitor_thread, args=(scanner, callback, interval)).start()
+
+
+def get_reception_statuses(scanners: list[Bearcat]) -> list[tuple[RadioState, bool, bool]]:
+    """
+    Sends the get reception status (GLG) command to several scanners, writing every command before reading any
+    response so that the round-trips to each scanner overlap.
+
+    Args:
+        scanners: scanners to query, a scanner given more than once is only queried once
+
+    Returns:
+        reception status of each scanner in order, see get_reception_status()
     """
-    Thread(target=_monitor_thread, args=(scanner, callback)).start()
+    unique = list(dict.fromkeys(scanners))
+    with ExitStack() as stack:
+        reads = [stack.enter_context(scanner.sent_command('GLG')) for scanner in unique]
+        statuses = {scanner: scanner.parse_reception_status(read()) for scanner, read in zip(unique, reads)}
+
+    return [statuses[scanner] for scanner in scanners]
+
+
+def run_on_scanners(scanners: list[Bearcat], func: Callable[[Bearcat], T]) -> list[T]:
+    """
+    Calls a given function on several scanners at once, each from its own thread. Serial and socket I/O release the
+    GIL, so the commands sent to each scanner overlap rather than waiting on each other.
+
+    Args:
+        scanners: scanners to call the function on
+        func: function which takes a scanner and sends it commands, for example lambda s: s.get_volume()
+
+    Returns:
+        the value returned by the function for each scanner in order
+    """
+    if len(scanners) < 2:
+        return [func(s) for s in scanners]
+
+    with ThreadPoolExecutor(max_workers=len(scanners)) as executor:
+        return list(executor.map(func, scanners))
 
 
 def find_scanners() -> list[Bearcat]:
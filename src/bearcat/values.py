@@ -26,6 +26,9 @@ BASE_TONE_MAP: dict[Union[str, float], int] = {
     732: 228, 734: 229, 743: 230, 754: 231
 }
 
+# reverse lookup of BASE_TONE_MAP, where multiple tones share a code the first listed is used
+BASE_TONE_CODE_MAP: dict[int, Union[str, float]] = {code: tone for tone, code in reversed(BASE_TONE_MAP.items())}
+
 HANDHELD_KEYS = [
     '<', '^', '>',
     'H', '1', '2', '3',
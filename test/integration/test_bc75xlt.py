@@ -6,6 +6,7 @@ from bearcat.classes import Channel, Modulation
 from bearcat.exceptions import UnexpectedResultError
 from bearcat.scanners.handheld import OperationMode, PriorityMode
 from bearcat.scanners.bc75xlt import BC75XLT, BC75XLT_CloseCallMode, BC75XLT_DelayTime
+from bearcat.tools import get_reception_statuses, run_on_scanners
 
 scanner = BC75XLT('/host-dev/ttyUSB0')
 
@@ -192,6 +193,44 @@ def test_get_reception_status():
     assert not mute
 
 
+def test_pipeline():
+    scanner.set_volume(5)
+    volume, (model,) = scanner.pipeline(('VOL', '7'), 'MDL')
+    assert volume == ['OK']
+    assert model == scanner.MODEL
+    assert scanner.get_volume() == 7
+
+    status, reception = scanner.pipeline('STS', 'GLG')
+    assert len(scanner.parse_status(status)[0].lines) == len(scanner.get_status()[0].lines)
+    assert scanner.parse_reception_status(reception)[0].frequency == scanner.get_reception_status()[0].frequency
+
+
+def test_program_mode():
+    with scanner.program_mode():
+        assert scanner.in_program_mode
+        with scanner.program_mode():
+            scanner.get_program_mode_number('CNT')
+
+        assert scanner.in_program_mode
+
+    assert not scanner.in_program_mode
+
+
+def test_get_status_and_reception():
+    (screen, _, _), (state, _, _) = scanner.get_status_and_reception()
+    assert len(screen.lines) == len(scanner.get_status()[0].lines)
+    assert state.frequency == scanner.get_reception_status()[0].frequency
+
+    statuses = get_reception_statuses([scanner])
+    assert len(statuses) == 1 and statuses[0][0].frequency == state.frequency
+
+    # a scanner given twice is only queried once
+    statuses = get_reception_statuses([scanner, scanner])
+    assert len(statuses) == 2 and statuses[0] == statuses[1]
+
+    assert run_on_scanners([scanner, scanner], lambda s: s.get_model()) == [scanner.MODEL] * 2
+
+
 def test_scan_groups():
     scanner.scan_groups(1, 3, 5, 7, 9)
     assert scanner.get_scan_channel_group() == [True, False] * 5
@@ -220,6 +259,36 @@ def test_channel_info():
     # priority isn't changed if all channels are locked out
     assert str(get_info) == str(Channel(24, modulation=Modulation.AM, delay='0', priority=get_info.priority))
 
+    set_info.index = 24
+    scanner.set_channel_info(set_info)
+    scanner.clear_channel(24, force=True)
+    assert str(scanner.get_channel_info(24)) == str(get_info)
+
+
+def test_bulk_set_channels():
+    set_infos = [Channel(i, '', 462562500 + i * 25000, Modulation.NFM, 0, '1', False, False) for i in range(30, 40)]
+    scanner.bulk_set_channels(set_infos)
+    for set_info in set_infos:
+        assert str(scanner.get_channel_info(set_info.index)) == str(set_info)
+
+    set_infos[2].frequency = 462087500
+    scanner.update_channels(set_infos)
+    assert str(scanner.get_channel_info(set_infos[2].index)) == str(set_infos[2])
+
+    scanner.bulk_set_channels([scanner.encode_channel(Channel(i)) for i in range(30, 40)])
+    for i in range(30, 40):
+        assert not scanner.get_channel_info(i).frequency
+
+
+def test_iter_channel_infos():
+    channels = list(scanner.iter_channel_infos())
+    assert [c.index for c in channels] == list(range(1, scanner.TOTAL_CHANNELS + 1))
+    assert str(channels[23]) == str(scanner.get_channel_info(24))
+
+    assert [c.index for c in scanner.iter_channel_infos(48, 53)] == list(range(48, 54))
+
+    assert [str(c) for c in scanner.get_channel_infos([24, 3])] == [str(channels[23]), str(channels[2])]
+
 
 def test_power_off():
     scanner.power_off()